@@ -1,5 +1,6 @@
 import click
 
+from aef_export.consolidate import consolidate_tiles, parse_source
 from aef_export.embeddings import export_image
 from aef_export.coverage import export_image_collection
 from aef_export.settings import get_settings
@@ -54,3 +55,37 @@ def image(
     initialize_ee(settings.google_cloud_project)
     task_id = export_image(image_id, gcs_bucket_name, gcs_key_prefix, quantize)
     click.echo(f"Task id: {task_id}")
+
+
+@app.command()
+@click.argument("dest")
+@click.argument("sources", nargs=-1, required=True)
+@click.option(
+    "--chunk-size", type=click.IntRange(min=1), default=128, show_default=True
+)
+@click.option("--workers", type=click.IntRange(min=1), default=None)
+def consolidate(
+    dest: str,
+    sources: tuple[str, ...],
+    chunk_size: int = 128,
+    workers: int | None = None,
+):
+    """Consolidate exported image tiles into a single Zarr store.
+
+    Mosaics the GeoTIFF tiles written by the image command into one chunked
+    (year, band, y, x) array at DEST, which may be a local path or a GCS URL.
+    Each source is given as YEAR=URI. Rerunning an interrupted conversion with
+    the same sources resumes from the chunks that were not yet written.
+    """
+    try:
+        tiles = [parse_source(source) for source in sources]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="SOURCES")
+
+    try:
+        n_chunks = consolidate_tiles(
+            tiles, dest, chunk_size=chunk_size, max_workers=workers
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Wrote {n_chunks} chunks to {dest}")
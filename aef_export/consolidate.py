@@ -0,0 +1,374 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import fsspec
+import numpy as np
+import rasterio
+import zarr
+from rasterio.windows import Window
+
+from aef_export.embeddings import (
+    QUANTIZE_MAX_VALUE,
+    QUANTIZE_MIN_VALUE,
+    QUANTIZE_POWER,
+    QUANTIZE_SCALE,
+)
+
+EMBEDDINGS_ARRAY = "embeddings"
+INT8_FILL_VALUE = -128
+
+
+@dataclass(frozen=True)
+class _Tile:
+    """An exported tile placed on the consolidated pixel grid."""
+
+    year: int
+    uri: str
+    row_off: int
+    col_off: int
+    height: int
+    width: int
+
+
+@dataclass(frozen=True)
+class _Grid:
+    """Shape, chunking and encoding of the consolidated embeddings array."""
+
+    years: tuple[int, ...]
+    band_count: int
+    height: int
+    width: int
+    chunk_size: int
+    dtype: str
+
+    @property
+    def fill_value(self) -> float | int:
+        return INT8_FILL_VALUE if self.dtype == "int8" else float("nan")
+
+    @property
+    def chunk_rows(self) -> int:
+        return -(-self.height // self.chunk_size)
+
+    @property
+    def chunk_cols(self) -> int:
+        return -(-self.width // self.chunk_size)
+
+    def chunk_bounds(self, chunk_row: int, chunk_col: int) -> tuple[int, int, int, int]:
+        row_start = chunk_row * self.chunk_size
+        col_start = chunk_col * self.chunk_size
+        return (
+            row_start,
+            min(row_start + self.chunk_size, self.height),
+            col_start,
+            min(col_start + self.chunk_size, self.width),
+        )
+
+
+def parse_source(source: str) -> tuple[int, str]:
+    """Parse a ``YEAR=URI`` source specification.
+
+    Args:
+        source: Source specification, e.g. ``2024=gs://bucket/prefix/tile.tif``.
+
+    Returns:
+        Tuple of the embedding year and the tile URI.
+
+    Raises:
+        ValueError: If the specification is not of the form ``YEAR=URI``.
+    """
+    year, sep, uri = source.partition("=")
+    if not sep or not uri or not year.strip().isdigit():
+        raise ValueError(f"Expected YEAR=URI, got {source!r}")
+    return int(year), uri
+
+
+def dequantize(values: np.ndarray) -> np.ndarray:
+    """Invert the int8 quantization applied by ``export_image``.
+
+    Args:
+        values: Quantized int8 embedding values.
+
+    Returns:
+        Float32 embedding values, with the int8 fill value mapped to NaN.
+    """
+    quantized = values.astype(np.float32)
+    magnitude = (np.abs(quantized) / QUANTIZE_SCALE) ** QUANTIZE_POWER
+    result = np.sign(quantized) * magnitude
+    return np.where(values == INT8_FILL_VALUE, np.float32("nan"), result)
+
+
+def _plan_layout(
+    sources: list[tuple[int, str]], chunk_size: int
+) -> tuple[_Grid, list[_Tile], dict]:
+    """Read tile headers and place every tile on a common pixel grid.
+
+    All tiles must share a CRS, pixel size, band layout and data type, and be
+    aligned to the same pixel grid, as is the case for tiles exported from
+    the same Earth Engine image collection and UTM zone.
+    """
+    profiles = []
+    descriptions = ()
+    for year, uri in sources:
+        with rasterio.open(uri) as src:
+            profiles.append((year, uri, src.crs, src.transform, src.profile))
+            descriptions = descriptions or src.descriptions
+
+    _, _, crs, transform, profile = profiles[0]
+    if transform.b != 0 or transform.d != 0:
+        raise ValueError("Rotated tiles are not supported")
+    res_x, res_y = transform.a, -transform.e
+    dtype = np.dtype(profile["dtype"]).name
+    if dtype != "int8" and not np.issubdtype(np.dtype(dtype), np.floating):
+        raise ValueError(f"Unsupported tile data type {dtype!r}")
+
+    for _, uri, tile_crs, tile_transform, tile_profile in profiles:
+        if tile_crs != crs:
+            raise ValueError(f"Tile {uri} has CRS {tile_crs}, expected {crs}")
+        if (tile_transform.a, tile_transform.e) != (transform.a, transform.e):
+            raise ValueError(f"Tile {uri} has a different pixel size")
+        if tile_profile["count"] != profile["count"]:
+            raise ValueError(f"Tile {uri} has {tile_profile['count']} bands")
+        if np.dtype(tile_profile["dtype"]).name != dtype:
+            raise ValueError(f"Tile {uri} has data type {tile_profile['dtype']}")
+
+    left = min(p[3].c for p in profiles)
+    top = max(p[3].f for p in profiles)
+
+    tiles = []
+    for year, uri, _, tile_transform, tile_profile in profiles:
+        col_off = (tile_transform.c - left) / res_x
+        row_off = (top - tile_transform.f) / res_y
+        if max(abs(col_off - round(col_off)), abs(row_off - round(row_off))) > 1e-6:
+            raise ValueError(f"Tile {uri} is not aligned to the pixel grid")
+        tiles.append(
+            _Tile(
+                year=year,
+                uri=uri,
+                row_off=round(row_off),
+                col_off=round(col_off),
+                height=tile_profile["height"],
+                width=tile_profile["width"],
+            )
+        )
+
+    grid = _Grid(
+        years=tuple(sorted({t.year for t in tiles})),
+        band_count=profile["count"],
+        height=max(t.row_off + t.height for t in tiles),
+        width=max(t.col_off + t.width for t in tiles),
+        chunk_size=chunk_size,
+        dtype=dtype,
+    )
+
+    attrs = {
+        "crs": crs.to_wkt(),
+        "transform": [res_x, 0.0, left, 0.0, -res_y, top],
+        "years": list(grid.years),
+        "chunk_size": chunk_size,
+        "band_names": [d or f"A{i:02d}" for i, d in enumerate(descriptions)],
+    }
+    if dtype == "int8":
+        attrs["quantization"] = {
+            "power": QUANTIZE_POWER,
+            "scale": QUANTIZE_SCALE,
+            "min_value": QUANTIZE_MIN_VALUE,
+            "max_value": QUANTIZE_MAX_VALUE,
+            "fill_value": INT8_FILL_VALUE,
+            "dequantize": "sign(q) * (abs(q) / scale) ** power",
+        }
+    return grid, tiles, attrs
+
+
+def _create_store(dest: str, grid: _Grid, attrs: dict) -> zarr.Group:
+    """Create the consolidated store, or reopen it to resume a previous run.
+
+    The embeddings array is created last, so its presence marks a store whose
+    attributes and coordinate arrays were fully written.
+    """
+    group = zarr.open_group(dest, mode="a")
+    shape = (len(grid.years), grid.band_count, grid.height, grid.width)
+    chunks = (len(grid.years), grid.band_count, grid.chunk_size, grid.chunk_size)
+    if EMBEDDINGS_ARRAY in group:
+        embeddings = group[EMBEDDINGS_ARRAY]
+        if (
+            dict(group.attrs) != attrs
+            or embeddings.shape != shape
+            or embeddings.chunks != chunks
+            or embeddings.dtype != np.dtype(grid.dtype)
+        ):
+            raise ValueError(
+                f"{dest} already contains a store with a different layout; "
+                "remove it or choose another destination"
+            )
+        return group
+
+    group.attrs.put(attrs)
+
+    res_x, _, left, _, neg_res_y, top = attrs["transform"]
+    coords = {
+        "year": np.array(grid.years, dtype="int32"),
+        "y": top + (np.arange(grid.height) + 0.5) * neg_res_y,
+        "x": left + (np.arange(grid.width) + 0.5) * res_x,
+    }
+    for name, values in coords.items():
+        array = group.create_array(
+            name,
+            shape=values.shape,
+            dtype=values.dtype,
+            dimension_names=(name,),
+            overwrite=True,
+        )
+        array[:] = values
+
+    group.create_array(
+        EMBEDDINGS_ARRAY,
+        shape=shape,
+        chunks=chunks,
+        dtype=grid.dtype,
+        fill_value=grid.fill_value,
+        chunk_key_encoding={"name": "default", "separator": "/"},
+        dimension_names=("year", "band", "y", "x"),
+    )
+    return group
+
+
+def _completed_chunks(dest: str) -> set[tuple[int, int]]:
+    """List the spatial chunks already written to the embeddings array.
+
+    Each chunk spans every year and band and is written in a single put, so
+    the chunk keys ``embeddings/c/0/0/<row>/<col>`` double as a completion
+    record that one listing can read, rather than one request per chunk.
+    """
+    fs, root = fsspec.core.url_to_fs(dest)
+    completed = set()
+    for key in fs.find(f"{root.rstrip('/')}/{EMBEDDINGS_ARRAY}/c"):
+        *_, chunk_row, chunk_col = key.split("/")
+        completed.add((int(chunk_row), int(chunk_col)))
+    return completed
+
+
+def _write_chunk(
+    dest: str, grid: _Grid, chunk_row: int, chunk_col: int, tiles: list[_Tile]
+) -> None:
+    """Mosaic every year's tiles for one spatial chunk and write it to the store.
+
+    Empty chunks are written too, so that every completed chunk has a key in
+    the store and an interrupted run rewrites only the chunks in flight.
+    """
+    row_start, row_stop, col_start, col_stop = grid.chunk_bounds(chunk_row, chunk_col)
+    block = np.full(
+        (len(grid.years), grid.band_count, row_stop - row_start, col_stop - col_start),
+        grid.fill_value,
+        dtype=grid.dtype,
+    )
+
+    for tile in tiles:
+        r0 = max(row_start, tile.row_off)
+        r1 = min(row_stop, tile.row_off + tile.height)
+        c0 = max(col_start, tile.col_off)
+        c1 = min(col_stop, tile.col_off + tile.width)
+        window = Window(c0 - tile.col_off, r0 - tile.row_off, c1 - c0, r1 - r0)
+        with rasterio.open(tile.uri) as src:
+            data = src.read(window=window, masked=True)
+        np.copyto(
+            block[
+                grid.years.index(tile.year),
+                :,
+                r0 - row_start : r1 - row_start,
+                c0 - col_start : c1 - col_start,
+            ],
+            data.data,
+            where=~np.ma.getmaskarray(data),
+        )
+
+    group = zarr.open_group(dest, mode="r+")
+    with zarr.config.set({"array.write_empty_chunks": True}):
+        group[EMBEDDINGS_ARRAY][:, :, row_start:row_stop, col_start:col_stop] = block
+
+
+def _overlapping_tiles(
+    grid: _Grid, chunk_row: int, chunk_col: int, tiles: list[_Tile]
+) -> list[_Tile]:
+    row_start, row_stop, col_start, col_stop = grid.chunk_bounds(chunk_row, chunk_col)
+    return [
+        t
+        for t in tiles
+        if t.row_off < row_stop
+        and t.row_off + t.height > row_start
+        and t.col_off < col_stop
+        and t.col_off + t.width > col_start
+    ]
+
+
+def consolidate_tiles(
+    sources: list[tuple[int, str]],
+    dest: str,
+    chunk_size: int = 128,
+    max_workers: int | None = None,
+) -> int:
+    """Consolidate exported embedding tiles into a single chunked Zarr store.
+
+    Mosaics the GeoTIFF tiles written by ``export_image`` for one or more years
+    into a ``(year, band, y, x)`` array. Each chunk spans every year and band
+    of a ``chunk_size`` square window, so a per-pixel time series and a
+    spatial window read both touch few chunks. Quantized int8 tiles are kept
+    as int8, with the dequantization parameters stored in the group attributes.
+
+    Chunks are written in parallel worker processes, each holding a single
+    chunk in memory. Completed chunks are recorded in the store, so rerunning
+    with the same sources resumes an interrupted conversion.
+
+    Args:
+        sources: ``(year, uri)`` pairs of exported tiles. A year may be split
+            across several tiles.
+        dest: Destination store path or URL, e.g. ``gs://bucket/aef.zarr``.
+        chunk_size: Height and width of each chunk in pixels. Defaults to 128.
+        max_workers: Number of worker processes. Defaults to the CPU count;
+            ``1`` writes chunks in the current process.
+
+    Returns:
+        Number of chunks written by this run.
+
+    Example:
+        >>> consolidate_tiles(
+        ...     [(2023, "gs://my-bucket/2023/tile.tif"),
+        ...      (2024, "gs://my-bucket/2024/tile.tif")],
+        ...     "gs://my-bucket/aef.zarr",
+        ... )
+    """
+    if not sources:
+        raise ValueError("At least one source tile is required")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    grid, tiles, attrs = _plan_layout(sources, chunk_size)
+    _create_store(dest, grid, attrs)
+
+    completed = _completed_chunks(dest)
+    pending = [
+        (chunk_row, chunk_col)
+        for chunk_row in range(grid.chunk_rows)
+        for chunk_col in range(grid.chunk_cols)
+        if (chunk_row, chunk_col) not in completed
+    ]
+    chunk_tiles = [_overlapping_tiles(grid, r, c, tiles) for r, c in pending]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        for (chunk_row, chunk_col), overlapping in zip(pending, chunk_tiles):
+            _write_chunk(dest, grid, chunk_row, chunk_col, overlapping)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            list(
+                executor.map(
+                    _write_chunk,
+                    [dest] * len(pending),
+                    [grid] * len(pending),
+                    [r for r, _ in pending],
+                    [c for _, c in pending],
+                    chunk_tiles,
+                )
+            )
+
+    return len(pending)
@@ -2,6 +2,11 @@ import ee
 
 from aef_export.utils import set_workload_tag
 
+QUANTIZE_POWER = 2.0
+QUANTIZE_SCALE = 127.5
+QUANTIZE_MIN_VALUE = -127
+QUANTIZE_MAX_VALUE = 127
+
 
 def _quantize_embeddings(image: ee.Image) -> ee.Image:
     """Apply quantization to embedding values for efficient storage.
@@ -17,14 +22,11 @@ def _quantize_embeddings(image: ee.Image) -> ee.Image:
     Returns:
         Earth Engine Image with quantized embedding values as int8.
     """
-    power = 2.0
-    scale = 127.5
-    min_value = -127
-    max_value = 127
-
-    sat = image.abs().pow(ee.Number(1.0).divide(power)).multiply(image.signum())
-    snapped = sat.multiply(scale).round()
-    image = snapped.clamp(min_value, max_value).int8()
+    sat = (
+        image.abs().pow(ee.Number(1.0).divide(QUANTIZE_POWER)).multiply(image.signum())
+    )
+    snapped = sat.multiply(QUANTIZE_SCALE).round()
+    image = snapped.clamp(QUANTIZE_MIN_VALUE, QUANTIZE_MAX_VALUE).int8()
     return image
 
 
@@ -1,7 +1,7 @@
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
 
-from aef_export.cli import coverage, image
+from aef_export.cli import consolidate, coverage, image
 
 
 @patch("aef_export.cli.export_image_collection")
@@ -114,3 +114,65 @@ def test_image_command_with_quantize_flag(
     # Verify the output and exit code
     assert result.exit_code == 0
     assert "Task id: quantized_task_456" in result.output
+
+
+@patch("aef_export.cli.consolidate_tiles")
+def test_consolidate_command_success(mock_consolidate_tiles):
+    mock_consolidate_tiles.return_value = 12
+
+    runner = CliRunner()
+    result = runner.invoke(
+        consolidate,
+        [
+            "gs://test-bucket/aef.zarr",
+            "2023=gs://test-bucket/2023/tile.tif",
+            "2024=gs://test-bucket/2024/tile.tif",
+            "--workers",
+            "4",
+        ],
+    )
+
+    # Verify the calls
+    mock_consolidate_tiles.assert_called_once_with(
+        [
+            (2023, "gs://test-bucket/2023/tile.tif"),
+            (2024, "gs://test-bucket/2024/tile.tif"),
+        ],
+        "gs://test-bucket/aef.zarr",
+        chunk_size=128,
+        max_workers=4,
+    )
+
+    # Verify the output and exit code
+    assert result.exit_code == 0
+    assert "Wrote 12 chunks to gs://test-bucket/aef.zarr" in result.output
+
+
+@patch("aef_export.cli.consolidate_tiles")
+def test_consolidate_command_invalid_source(mock_consolidate_tiles):
+    runner = CliRunner()
+    result = runner.invoke(
+        consolidate, ["gs://test-bucket/aef.zarr", "gs://test-bucket/tile.tif"]
+    )
+
+    mock_consolidate_tiles.assert_not_called()
+    assert result.exit_code == 2
+    assert "Expected YEAR=URI" in result.output
+
+
+@patch("aef_export.cli.consolidate_tiles")
+def test_consolidate_command_rejects_non_positive_chunk_size(mock_consolidate_tiles):
+    runner = CliRunner()
+    result = runner.invoke(
+        consolidate,
+        [
+            "gs://test-bucket/aef.zarr",
+            "2024=gs://test-bucket/2024/tile.tif",
+            "--chunk-size",
+            "0",
+        ],
+    )
+
+    mock_consolidate_tiles.assert_not_called()
+    assert result.exit_code == 2
+    assert "--chunk-size" in result.output
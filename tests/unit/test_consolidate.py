@@ -0,0 +1,225 @@
+import numpy as np
+import pytest
+import rasterio
+import zarr
+from rasterio.transform import from_origin
+
+from aef_export.consolidate import (
+    EMBEDDINGS_ARRAY,
+    INT8_FILL_VALUE,
+    consolidate_tiles,
+    dequantize,
+    parse_source,
+)
+
+
+def _write_tile(path, data, left, top, crs="EPSG:32633"):
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        height=data.shape[1],
+        width=data.shape[2],
+        count=data.shape[0],
+        dtype=data.dtype,
+        crs=crs,
+        transform=from_origin(left, top, 10, 10),
+    ) as dst:
+        dst.write(data)
+    return str(path)
+
+
+def test_parse_source_splits_year_and_uri():
+    assert parse_source("2024=gs://bucket/a=b.tif") == (2024, "gs://bucket/a=b.tif")
+
+
+@pytest.mark.parametrize("source", ["gs://bucket/tile.tif", "year=tile.tif", "2024="])
+def test_parse_source_rejects_invalid_specification(source):
+    with pytest.raises(ValueError, match="Expected YEAR=URI"):
+        parse_source(source)
+
+
+def test_dequantize_inverts_quantization():
+    embeddings = np.linspace(-1, 1, 201, dtype=np.float32)
+    # numpy copy of _quantize_embeddings
+    quantized = np.clip(
+        np.round(np.sign(embeddings) * np.sqrt(np.abs(embeddings)) * 127.5), -127, 127
+    ).astype(np.int8)
+
+    result = dequantize(quantized)
+
+    # One quantization step of sqrt(|x|) is 1 / 127.5, so the round trip error
+    # is bounded by d(x**2) = 2 * sqrt(|x|) * half a step plus the clamp at 127
+    tolerance = 2 * np.sqrt(np.abs(embeddings)) * (0.5 / 127.5) + 1 / 127.5**2
+    assert (np.abs(result - embeddings) <= tolerance).all()
+    assert result.dtype == np.float32
+
+
+def test_dequantize_maps_fill_value_to_nan():
+    result = dequantize(np.array([INT8_FILL_VALUE, 0], dtype=np.int8))
+
+    assert np.isnan(result[0])
+    assert result[1] == 0
+
+
+def test_consolidate_tiles_mosaics_years_into_store(tmp_path):
+    # 2023 is split across two side by side tiles, 2024 covers only the left one
+    left_2023 = np.full((2, 4, 3), 1, dtype=np.int8)
+    right_2023 = np.full((2, 4, 2), 2, dtype=np.int8)
+    left_2024 = np.arange(24, dtype=np.int8).reshape(2, 4, 3)
+    sources = [
+        (2024, _write_tile(tmp_path / "2024.tif", left_2024, 500000, 4000040)),
+        (2023, _write_tile(tmp_path / "2023a.tif", left_2023, 500000, 4000040)),
+        (2023, _write_tile(tmp_path / "2023b.tif", right_2023, 500030, 4000040)),
+    ]
+    dest = str(tmp_path / "aef.zarr")
+
+    n_chunks = consolidate_tiles(sources, dest, chunk_size=2, max_workers=1)
+
+    group = zarr.open_group(dest, mode="r")
+    embeddings = group[EMBEDDINGS_ARRAY]
+    assert n_chunks == 6
+    assert embeddings.shape == (2, 2, 4, 5)
+    assert embeddings.chunks == (2, 2, 2, 2)
+    assert embeddings.dtype == np.int8
+    np.testing.assert_array_equal(embeddings[0, :, :, :3], left_2023)
+    np.testing.assert_array_equal(embeddings[0, :, :, 3:], right_2023)
+    np.testing.assert_array_equal(embeddings[1, :, :, :3], left_2024)
+    assert (embeddings[1, :, :, 3:] == INT8_FILL_VALUE).all()
+
+    np.testing.assert_array_equal(group["year"][:], [2023, 2024])
+    np.testing.assert_allclose(group["x"][:], 500005 + 10 * np.arange(5))
+    np.testing.assert_allclose(group["y"][:], 4000035 - 10 * np.arange(4))
+    assert group.attrs["years"] == [2023, 2024]
+    assert group.attrs["transform"] == [10.0, 0.0, 500000.0, 0.0, -10.0, 4000040.0]
+    assert group.attrs["quantization"]["scale"] == 127.5
+    assert consolidate_tiles(sources, dest, chunk_size=2, max_workers=1) == 0
+
+
+def test_consolidate_tiles_keeps_float_tiles_unquantized(tmp_path):
+    data = np.random.default_rng(0).uniform(-1, 1, (3, 2, 2)).astype(np.float32)
+    sources = [(2024, _write_tile(tmp_path / "2024.tif", data, 500000, 4000020))]
+    dest = str(tmp_path / "aef.zarr")
+
+    consolidate_tiles(sources, dest, max_workers=1)
+
+    group = zarr.open_group(dest, mode="r")
+    np.testing.assert_array_equal(group[EMBEDDINGS_ARRAY][0], data)
+    assert "quantization" not in group.attrs
+
+
+def test_consolidate_tiles_resumes_incomplete_chunks(tmp_path):
+    data = np.ones((1, 4, 4), dtype=np.int8)
+    sources = [(2024, _write_tile(tmp_path / "2024.tif", data, 500000, 4000040))]
+    dest = str(tmp_path / "aef.zarr")
+    consolidate_tiles(sources, dest, chunk_size=2, max_workers=1)
+
+    # Simulate an interrupted run that never wrote the last chunk
+    (tmp_path / "aef.zarr" / EMBEDDINGS_ARRAY / "c" / "0" / "0" / "1" / "1").unlink()
+    group = zarr.open_group(dest, mode="r")
+    assert (group[EMBEDDINGS_ARRAY][0, 0, 2:, 2:] == INT8_FILL_VALUE).all()
+
+    n_chunks = consolidate_tiles(sources, dest, chunk_size=2, max_workers=1)
+
+    assert n_chunks == 1
+    np.testing.assert_array_equal(group[EMBEDDINGS_ARRAY][0], data)
+
+
+def test_consolidate_tiles_rejects_store_with_different_layout(tmp_path):
+    data = np.ones((1, 2, 2), dtype=np.int8)
+    dest = str(tmp_path / "aef.zarr")
+    consolidate_tiles(
+        [(2023, _write_tile(tmp_path / "2023.tif", data, 500000, 4000020))],
+        dest,
+        max_workers=1,
+    )
+
+    with pytest.raises(ValueError, match="different layout"):
+        consolidate_tiles(
+            [(2024, _write_tile(tmp_path / "2024.tif", data, 500000, 4000020))],
+            dest,
+            max_workers=1,
+        )
+
+
+def test_consolidate_tiles_rejects_mismatched_crs(tmp_path):
+    data = np.ones((1, 2, 2), dtype=np.int8)
+    sources = [
+        (2023, _write_tile(tmp_path / "a.tif", data, 500000, 4000020)),
+        (2024, _write_tile(tmp_path / "b.tif", data, 500000, 4000020, "EPSG:32634")),
+    ]
+
+    with pytest.raises(ValueError, match="has CRS"):
+        consolidate_tiles(sources, str(tmp_path / "aef.zarr"), max_workers=1)
+
+
+def test_consolidate_tiles_rejects_store_with_different_chunk_size(tmp_path):
+    data = np.ones((1, 32, 32), dtype=np.int8)
+    sources = [(2024, _write_tile(tmp_path / "2024.tif", data, 500000, 4000320))]
+    dest = str(tmp_path / "aef.zarr")
+    consolidate_tiles(sources, dest, chunk_size=8, max_workers=1)
+
+    with pytest.raises(ValueError, match="different layout"):
+        consolidate_tiles(sources, dest, chunk_size=16, max_workers=1)
+
+
+def test_consolidate_tiles_recovers_from_interrupted_store_creation(tmp_path):
+    data = np.ones((1, 4, 4), dtype=np.float32)
+    sources = [(2024, _write_tile(tmp_path / "2024.tif", data, 500000, 4000040))]
+    dest = str(tmp_path / "aef.zarr")
+
+    # Simulate a run on int8 tiles that died after writing only part of the
+    # store metadata
+    group = zarr.open_group(dest, mode="w")
+    group.attrs["quantization"] = {"scale": 127.5}
+    group.create_array("year", shape=(3,), dtype="int32")
+
+    n_chunks = consolidate_tiles(sources, dest, chunk_size=2, max_workers=1)
+
+    assert n_chunks == 4
+    assert "quantization" not in zarr.open_group(dest, mode="r").attrs
+    assert consolidate_tiles(sources, dest, chunk_size=2, max_workers=1) == 0
+    np.testing.assert_array_equal(group["year"][:], [2024])
+    np.testing.assert_array_equal(group[EMBEDDINGS_ARRAY][0], data)
+
+
+def test_consolidate_tiles_rejects_non_positive_chunk_size(tmp_path):
+    data = np.ones((1, 2, 2), dtype=np.int8)
+    sources = [(2024, _write_tile(tmp_path / "2024.tif", data, 500000, 4000020))]
+
+    with pytest.raises(ValueError, match="chunk_size must be positive"):
+        consolidate_tiles(sources, str(tmp_path / "aef.zarr"), chunk_size=0)
+
+
+def test_consolidate_tiles_writes_chunks_in_worker_processes(tmp_path):
+    data = np.arange(2 * 10 * 10, dtype=np.float32).reshape(2, 10, 10)
+    sources = [
+        (2023, _write_tile(tmp_path / "2023.tif", data, 500000, 4000100)),
+        (2024, _write_tile(tmp_path / "2024.tif", data * 2, 500000, 4000100)),
+    ]
+    dest = str(tmp_path / "aef.zarr")
+
+    n_chunks = consolidate_tiles(sources, dest, chunk_size=4, max_workers=2)
+
+    group = zarr.open_group(dest, mode="r")
+    assert n_chunks == 9
+    np.testing.assert_array_equal(group[EMBEDDINGS_ARRAY][0], data)
+    np.testing.assert_array_equal(group[EMBEDDINGS_ARRAY][1], data * 2)
+    assert consolidate_tiles(sources, dest, chunk_size=4, max_workers=2) == 0
+
+
+def test_consolidate_tiles_records_chunks_without_tile_coverage(tmp_path):
+    # The two tiles leave the top right and bottom left chunks empty
+    data = np.ones((1, 2, 2), dtype=np.int8)
+    sources = [
+        (2024, _write_tile(tmp_path / "a.tif", data, 500000, 4000040)),
+        (2024, _write_tile(tmp_path / "b.tif", data, 500020, 4000020)),
+    ]
+    dest = str(tmp_path / "aef.zarr")
+
+    assert consolidate_tiles(sources, dest, chunk_size=2, max_workers=1) == 4
+
+    chunk_keys = tmp_path / "aef.zarr" / EMBEDDINGS_ARRAY / "c" / "0" / "0"
+    assert (chunk_keys / "0" / "1").exists()
+    assert (chunk_keys / "1" / "0").exists()
+    assert consolidate_tiles(sources, dest, chunk_size=2, max_workers=1) == 0